@@ -1,3 +1,5 @@
+import json
+
 SIG_KEY_VERSION = "4"
 IG_SIG_KEY = "a86109795736d73c9a94172cd9b736917d7d94ca61c9101164894b3f0d43bef4"
 API_DOMAIN = "i.instagram.com"
@@ -28,3 +30,9 @@ SUPPORTED_CAPABILITIES = [
     {"name": "world_tracker", "value": "world_tracker_enabled"},
     {"name": "gyroscope", "value": "gyroscope_enabled"}
 ]
+
+# Serialized once at import time: the blob is embedded as a JSON string
+# in many request bodies and never changes
+SUPPORTED_CAPABILITIES_JSON = json.dumps(
+    SUPPORTED_CAPABILITIES, separators=(",", ":")
+)
@@ -2,13 +2,15 @@ import base64
 import datetime
 import hashlib
 import hmac
-import json
 import random
 import re
+import secrets
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, NamedTuple
 from uuid import uuid4
 
 import requests
@@ -16,13 +18,49 @@ import requests
 from instagrapi import config
 from instagrapi.exceptions import (
     PleaseWaitFewMinutes,
-    PrivateError,
     ReloginAttemptExceeded,
     TwoFactorRequired,
 )
-from instagrapi.utils import generate_jazoest
+from instagrapi.utils import dumps, generate_jazoest, loads
 from instagrapi.zones import CET
 
+# CET has a fixed utc offset, so the formatted value never changes
+TIMEZONE_OFFSET = datetime.datetime.now(CET()).strftime("%z")
+
+# Prototype copied per call so the key schedule is computed only once
+BREADCRUMB_HMAC = hmac.new(b"iN4$aGr0m", digestmod=hashlib.sha256)
+
+
+def _gather_flow(calls: List) -> List[Dict]:
+    """
+    Run independent flow requests in a thread pool
+
+    Parameters
+    ----------
+    calls: List
+        Zero-argument callables issuing the requests
+
+    Returns
+    -------
+    List[Dict]
+        Responses in the order the calls were given
+    """
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
+
+
+class SessionContext(NamedTuple):
+    """
+    Bundle of per-session identifiers filled into request templates
+    """
+
+    phone_id: str = ""
+    uuid: str = ""
+    client_session_id: str = ""
+    advertising_id: str = ""
+    device_id: str = ""
+
 
 class PreLoginFlowMixin:
     """
@@ -38,11 +76,14 @@ class PreLoginFlowMixin:
         bool
             A boolean value
         """
-        self.set_contact_point_prefill("prefill")
-        self.get_prefill_candidates(True)
-        self.set_contact_point_prefill("prefill")
-        self.sync_launcher(True)
-        self.sync_device_features(True)
+        # These requests are independent of each other, so they are sent
+        # concurrently and the flow takes one RTT instead of one per call
+        _gather_flow([
+            partial(self.set_contact_point_prefill, "prefill"),
+            partial(self.get_prefill_candidates, True),
+            partial(self.sync_launcher, True),
+            partial(self.sync_device_features, True),
+        ])
         return True
 
     def get_prefill_candidates(self, login: bool = False) -> Dict:
@@ -155,14 +196,15 @@ class PostLoginFlowMixin:
         bool
             A boolean value
         """
-        check_flow = []
         chance = random.randint(1, 100) % 2 == 0
-        check_flow.append(self.get_timeline_feed([chance and "is_pull_to_refresh"]))
-        check_flow.append(
-            self.get_reels_tray_feed(
-                reason="pull_to_refresh" if chance else "cold_start"
-            )
-        )
+        # Timeline and reels tray are independent, fetch them concurrently
+        check_flow = _gather_flow([
+            partial(self.get_timeline_feed, [chance and "is_pull_to_refresh"]),
+            partial(
+                self.get_reels_tray_feed,
+                reason="pull_to_refresh" if chance else "cold_start",
+            ),
+        ])
         return all(check_flow)
 
     def get_timeline_feed(self, options: List[Dict] = []) -> Dict:
@@ -179,23 +221,26 @@ class PostLoginFlowMixin:
         Dict
             A dictionary of response from the call
         """
+        # One draw covers all the emulated telemetry noise instead of
+        # spinning the RNG once per field
+        rand = random.getrandbits(32)
         headers = {
             "X-Ads-Opt-Out": "0",
             "X-DEVICE-ID": self.uuid,
             "X-CM-Bandwidth-KBPS": '-1.000',  # str(random.randint(2000, 5000)),
-            "X-CM-Latency": str(random.randint(1, 5)),
+            "X-CM-Latency": str(rand % 5 + 1),
         }
         data = {
             "feed_view_info": "",
             "phone_id": self.phone_id,
-            "battery_level": random.randint(25, 100),
-            "timezone_offset": datetime.datetime.now(CET()).strftime("%z"),
+            "battery_level": (rand >> 3) % 76 + 25,
+            "timezone_offset": TIMEZONE_OFFSET,
             "_csrftoken": self.token,
             "device_id": self.uuid,
             "request_id": self.device_id,
             "_uuid": self.uuid,
-            "is_charging": random.randint(0, 1),
-            "will_sound_on": random.randint(0, 1),
+            "is_charging": (rand >> 10) & 1,
+            "will_sound_on": (rand >> 11) & 1,
             "session_id": self.client_session_id,
             "bloks_versioning_id": "e538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88e",
         }
@@ -214,7 +259,7 @@ class PostLoginFlowMixin:
             data["recovered_from_crash"] = "1"
 
         return self.private_request(
-            "feed/timeline/", json.dumps(data), with_signature=False, headers=headers
+            "feed/timeline/", dumps(data), with_signature=False, headers=headers
         )
 
     def get_reels_tray_feed(self, reason: str = "pull_to_refresh") -> Dict:
@@ -232,7 +277,7 @@ class PostLoginFlowMixin:
             A dictionary of response from the call
         """
         data = {
-            "supported_capabilities_new": config.SUPPORTED_CAPABILITIES,
+            "supported_capabilities_new": config.SUPPORTED_CAPABILITIES_JSON,
             "reason": reason,
             "_csrftoken": self.token,
             "_uuid": self.uuid,
@@ -241,16 +286,17 @@ class PostLoginFlowMixin:
 
 
 class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
-    username = None
+    _username = None
     password = None
     last_login = None
+    # Skip the pre login emulation when the persisted session logged in
+    # within this many seconds (see load_settings/dump_settings)
+    pre_login_flow_ttl = 60 * 60 * 24
     relogin_attempt = 0
     device_settings = {}
-    client_session_id = ""
-    advertising_id = ""
-    device_id = ""
-    phone_id = ""
-    uuid = ""
+    session_context = SessionContext()
+    _cookie_cache = None
+    _rank_token = None
 
     def __init__(self):
         self.user_agent = None
@@ -269,6 +315,7 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
             self.private.cookies = requests.utils.cookiejar_from_dict(
                 self.settings["cookies"]
             )
+        self._clear_cookie_cache()
         self.last_login = self.settings.get("last_login")
         self.set_device(self.settings.get("device_settings"))
         self.set_user_agent(self.settings.get("user_agent"))
@@ -290,15 +337,13 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
             A boolean value
         """
         assert isinstance(sessionid, str) and len(sessionid) > 30, "Invalid sessionid"
-        self.settings = {"cookies": {"sessionid": sessionid}}
-        self.init()
+        # The sessionid is prefixed with the user id, so ds_user_id can be
+        # set directly and the username resolved lazily (saves one request)
         user_id = re.search(r"^\d+", sessionid).group()
-        try:
-            user = self.user_info_v1(int(user_id))
-        except PrivateError:
-            user = self.user_short_gql(int(user_id))
-        self.username = user.username
-        self.cookie_dict["ds_user_id"] = user.pk
+        self.settings = {
+            "cookies": {"sessionid": sessionid, "ds_user_id": user_id}
+        }
+        self.init()
         return True
 
     def login(self, username: str, password: str, relogin: bool = False, verification_code: str = '') -> bool:
@@ -326,6 +371,7 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         self.init()
         if relogin:
             self.private.cookies.clear()
+            self._clear_cookie_cache()
             if self.relogin_attempt > 1:
                 raise ReloginAttemptExceeded()
             self.relogin_attempt += 1
@@ -334,12 +380,7 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         #        return True  # already login
         if self.user_id:
             return True  # already login
-        try:
-            self.pre_login_flow()
-        except PleaseWaitFewMinutes:
-            # The instagram application ignores this error
-            # and continues to log in (repeat this behavior)
-            pass
+        self._maybe_pre_login_flow()
         enc_password = self.password_encrypt(password)
         data = {
             "jazoest": generate_jazoest(self.phone_id),
@@ -381,6 +422,30 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
             return True
         return False
 
+    def _maybe_pre_login_flow(self) -> bool:
+        """
+        Run pre_login_flow unless the persisted session logged in within
+        pre_login_flow_ttl seconds
+
+        Returns
+        -------
+        bool
+            Whether the flow was run
+        """
+        recent_login = bool(
+            self.last_login
+            and time.time() - self.last_login < self.pre_login_flow_ttl
+        )
+        if recent_login:
+            return False
+        try:
+            self.pre_login_flow()
+        except PleaseWaitFewMinutes:
+            # The instagram application ignores this error
+            # and continues to log in (repeat this behavior)
+            pass
+        return True
+
     def relogin(self) -> bool:
         """
         Relogin helper
@@ -392,9 +457,63 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         """
         return self.login(self.username, self.password, relogin=True)
 
+    @property
+    def phone_id(self) -> str:
+        return self.session_context.phone_id
+
+    @property
+    def uuid(self) -> str:
+        return self.session_context.uuid
+
+    @property
+    def client_session_id(self) -> str:
+        return self.session_context.client_session_id
+
+    @property
+    def advertising_id(self) -> str:
+        return self.session_context.advertising_id
+
+    @property
+    def device_id(self) -> str:
+        return self.session_context.device_id
+
+    @property
+    def username(self) -> str:
+        if self._username is None and self.user_id:
+            self._username = self.username_from_user_id(self.user_id)
+        return self._username
+
+    @username.setter
+    def username(self, username: str):
+        self._username = username
+
+    def _clear_cookie_cache(self) -> bool:
+        """
+        Drop memoized cookie values after the cookie jar changes
+
+        Returns
+        -------
+        bool
+            A boolean value
+        """
+        self._cookie_cache = None
+        self._rank_token = None
+        return True
+
     @property
     def cookie_dict(self) -> dict:
-        return self.private.cookies.get_dict()
+        # Work on a local: a concurrent _clear_cookie_cache between the
+        # attribute store and the return must not make this yield None
+        cache = self._cookie_cache
+        if cache is None:
+            jar = self.private.cookies
+            # The jar takes this lock for writes; hold it so a flow
+            # worker extracting response cookies cannot resize the dict
+            # mid-snapshot
+            with jar._cookies_lock:
+                cache = jar.get_dict()
+            self._cookie_cache = cache
+        return cache
 
     @property
     def sessionid(self) -> str:
@@ -406,7 +525,9 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
 
     @property
     def rank_token(self) -> str:
-        return f"{self.user_id}_{self.uuid}"
+        if self._rank_token is None:
+            self._rank_token = f"{self.user_id}_{self.uuid}"
+        return self._rank_token
 
     @property
     def user_id(self) -> int:
@@ -415,10 +536,6 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
             return int(user_id)
         return None
 
-    # @property
-    # def username(self):
-    #     return self.cookie_dict.get("ds_user")
-
     @property
     def mid(self) -> str:
         return self.cookie_dict.get("mid")
@@ -441,13 +558,7 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
             Current session settings as a Dict
         """
         return {
-            "uuids": {
-                "phone_id": self.phone_id,
-                "uuid": self.uuid,
-                "client_session_id": self.client_session_id,
-                "advertising_id": self.advertising_id,
-                "device_id": self.device_id,
-            },
+            "uuids": self.session_context._asdict(),
             "cookies": requests.utils.dict_from_cookiejar(self.private.cookies),
             "last_login": self.last_login,
             "device_settings": self.device_settings,
@@ -479,10 +590,9 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         Dict
             Current session settings as a Dict
         """
-        with open(path, 'r') as fp:
-            self.set_settings(json.load(fp))
-            return self.settings
-        return None
+        with open(path, 'rb') as fp:
+            self.set_settings(loads(fp.read()))
+        return self.settings
 
     def dump_settings(self, path: Path) -> bool:
         """
@@ -497,8 +607,8 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         -------
         Bool
         """
-        with open(path, 'w') as fp:
-            json.dump(self.get_settings(), fp)
+        with open(path, 'wb') as fp:
+            fp.write(dumps(self.get_settings()).encode())
         return True
 
     def set_device(self, device: Dict = None) -> bool:
@@ -567,11 +677,15 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         bool
             A boolean value
         """
-        self.phone_id = uuids.get("phone_id", self.generate_uuid())
-        self.uuid = uuids.get("uuid", self.generate_uuid())
-        self.client_session_id = uuids.get("client_session_id", self.generate_uuid())
-        self.advertising_id = uuids.get("advertising_id", self.generate_uuid())
-        self.device_id = uuids.get("device_id", self.generate_device_id())
+        self._rank_token = None
+        self._base_headers_static = None
+        self.session_context = SessionContext(
+            phone_id=uuids.get("phone_id", self.generate_uuid()),
+            uuid=uuids.get("uuid", self.generate_uuid()),
+            client_session_id=uuids.get("client_session_id", self.generate_uuid()),
+            advertising_id=uuids.get("advertising_id", self.generate_uuid()),
+            device_id=uuids.get("device_id", self.generate_device_id()),
+        )
         return True
 
     def generate_uuid(self) -> str:
@@ -594,9 +708,7 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         str
             A random android device id
         """
-        return (
-            "android-%s" % hashlib.md5(str(time.time()).encode()).hexdigest()[:16]
-        )
+        return "android-%s" % secrets.token_hex(8)
 
     def expose(self) -> Dict:
         """
@@ -619,15 +731,13 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         Dict
             A dictionary of default data
         """
-        return dict(
-            {
-                "_uuid": self.uuid,
-                "_uid": str(self.user_id),
-                "_csrftoken": self.token,
-                "device_id": self.device_id,
-            },
+        return {
+            "_uuid": self.uuid,
+            "_uid": str(self.user_id),
+            "_csrftoken": self.token,
+            "device_id": self.device_id,
             **data,
-        )
+        }
 
     def with_action_data(self, data: Dict) -> Dict:
         """
@@ -638,7 +748,7 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         Dict
             A dictionary of action data
         """
-        return dict(self.with_default_data({"radio_type": "wifi-none"}), **data)
+        return self.with_default_data({"radio_type": "wifi-none", **data})
 
     def gen_user_breadcrumb(self, size: int) -> str:
         """
@@ -654,7 +764,6 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
         Str
             A string
         """
-        key = "iN4$aGr0m"
         dt = int(time.time() * 1000)
         time_elapsed = random.randint(500, 1500) + size * random.randint(500, 1500)
         text_change_event_count = max(1, size / random.randint(3, 5))
@@ -665,14 +774,12 @@ class LoginMixin(PreLoginFlowMixin, PostLoginFlowMixin):
                 "count": text_change_event_count,
                 "dt": dt,
             }
-        )
+        ).encode("ascii")
+        mac = BREADCRUMB_HMAC.copy()
+        mac.update(data)
         return "{!s}\n{!s}\n".format(
-            base64.b64encode(
-                hmac.new(
-                    key.encode("ascii"), data.encode("ascii"), digestmod=hashlib.sha256
-                ).digest()
-            ),
-            base64.b64encode(data.encode("ascii")),
+            base64.b64encode(mac.digest()).decode("ascii"),
+            base64.b64encode(data).decode("ascii"),
         )
 
     def inject_sessionid_to_public(self) -> bool:
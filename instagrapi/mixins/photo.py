@@ -387,7 +387,7 @@ class UploadPhotoMixin:
         story_sticker_ids = []
         data = {
             "text_metadata": '[{"font_size":40.0,"scale":1.0,"width":611.0,"height":169.0,"x":0.51414347,"y":0.8487708,"rotation":0.0}]',
-            "supported_capabilities_new": json.dumps(config.SUPPORTED_CAPABILITIES),
+            "supported_capabilities_new": config.SUPPORTED_CAPABILITIES_JSON,
             "has_original_sound": "1",
             "camera_session_id": self.client_session_id,
             "scene_capture_type": "",
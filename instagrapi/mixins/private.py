@@ -2,6 +2,7 @@ import hashlib
 import json
 import logging
 import random
+import threading
 import time
 from json.decoder import JSONDecodeError
 
@@ -67,9 +68,21 @@ class PrivateRequestMixin:
     request_timeout = 1
     last_response = None
     last_json = {}
+    _base_headers_static = None
 
     def __init__(self, *args, **kwargs):
         self.private = requests.Session()
+        # Keep enough pooled keep-alive connections for the concurrent
+        # login flows, so bursts of requests reuse one TLS handshake
+        # instead of opening a fresh connection each. The adapter is
+        # also mounted on the per-thread worker sessions (urllib3 pools
+        # are thread safe), so all threads draw from this one pool
+        self._private_adapter = requests.adapters.HTTPAdapter(
+            pool_connections=10, pool_maxsize=20
+        )
+        self.private.mount("https://", self._private_adapter)
+        self.private.mount("http://", self._private_adapter)
+        self._thread_locals = threading.local()
         self.email = kwargs.pop("email", None)
         self.phone_number = kwargs.pop("phone_number", None)
         self.request_timeout = kwargs.pop(
@@ -98,48 +111,85 @@ class PrivateRequestMixin:
 
     @property
     def base_headers(self):
-        return {
-            "X-IG-App-Locale": "en_US",
-            "X-IG-Device-Locale": "en_US",
-            "X-IG-Mapped-Locale": "en_US",
-            "X-Pigeon-Session-Id": self.generate_uuid(),
-            "X-Pigeon-Rawclienttime": str(round(time.time() * 1000) / 1000),
-            "X-IG-Connection-Speed": "-1kbps",
-            "X-IG-Bandwidth-Speed-KBPS": "-1.000",  # str(random.randint(2900000, 10000000) / 1000),
-            "X-IG-Bandwidth-TotalBytes-B": "0",  # str(random.randint(5000000, 90000000)),
-            "X-IG-Bandwidth-TotalTime-MS": "0",  # str(random.randint(5000, 15000)),
-            # "X-IG-EU-DC-ENABLED": "true", # <- type of DC? Eu is euro, but we use US
-            # "X-IG-Prefetch-Request": "foreground",  # OLD from instabot
-            "X-IG-App-Startup-Country": "US",
-            "X-Bloks-Version-Id": hashlib.sha256(
-                json.dumps(self.device_settings).encode()
-            ).hexdigest(),
-            "X-IG-WWW-Claim": "0",
-            "X-Bloks-Is-Layout-RTL": "false",
-            # "X-Bloks-Enable-RenderCore": "false",  # OLD from instabot
-            "X-MID": self.mid,  # "XkAyKQABAAHizpYQvHzNeBo4E9nm" in instabot
-            "X-Bloks-Is-Panorama-Enabled": "true",
-            "X-IG-Device-ID": self.uuid,
-            "X-IG-Android-ID": self.device_id,
-            "X-IG-Connection-Type": "WIFI",
-            "X-IG-Capabilities": "3brTvwM=",  # "3brTvwE=" in instabot
-            "X-IG-App-ID": "567067343352427",
-            "User-Agent": self.user_agent,
-            "Accept-Language": "en-US",
-            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-            "Accept-Encoding": "gzip, deflate",
-            # "Host": "i.instagram.com",
-            "X-FB-HTTP-Engine": "Liger",
-            "Connection": "keep-alive",  # "close" in instabot
-            # "Pragma": "no-cache",
-            # "Cache-Control": "no-cache",
-            "X-FB-Client-IP": "True",
-        }
+        if self._base_headers_static is None:
+            # Rebuilt only when device, user agent or uuids change
+            self._base_headers_static = {
+                "X-IG-App-Locale": "en_US",
+                "X-IG-Device-Locale": "en_US",
+                "X-IG-Mapped-Locale": "en_US",
+                "X-IG-Connection-Speed": "-1kbps",
+                "X-IG-Bandwidth-Speed-KBPS": "-1.000",  # str(random.randint(2900000, 10000000) / 1000),
+                "X-IG-Bandwidth-TotalBytes-B": "0",  # str(random.randint(5000000, 90000000)),
+                "X-IG-Bandwidth-TotalTime-MS": "0",  # str(random.randint(5000, 15000)),
+                # "X-IG-EU-DC-ENABLED": "true", # <- type of DC? Eu is euro, but we use US
+                # "X-IG-Prefetch-Request": "foreground",  # OLD from instabot
+                "X-IG-App-Startup-Country": "US",
+                "X-Bloks-Version-Id": hashlib.sha256(
+                    json.dumps(self.device_settings).encode()
+                ).hexdigest(),
+                "X-IG-WWW-Claim": "0",
+                "X-Bloks-Is-Layout-RTL": "false",
+                # "X-Bloks-Enable-RenderCore": "false",  # OLD from instabot
+                "X-Bloks-Is-Panorama-Enabled": "true",
+                "X-IG-Device-ID": self.uuid,
+                "X-IG-Android-ID": self.device_id,
+                "X-IG-Connection-Type": "WIFI",
+                "X-IG-Capabilities": "3brTvwM=",  # "3brTvwE=" in instabot
+                "X-IG-App-ID": "567067343352427",
+                "User-Agent": self.user_agent,
+                "Accept-Language": "en-US",
+                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+                "Accept-Encoding": "gzip, deflate",
+                # "Host": "i.instagram.com",
+                "X-FB-HTTP-Engine": "Liger",
+                "Connection": "keep-alive",  # "close" in instabot
+                # "Pragma": "no-cache",
+                # "Cache-Control": "no-cache",
+                "X-FB-Client-IP": "True",
+            }
+        return dict(
+            self._base_headers_static,
+            **{
+                "X-Pigeon-Session-Id": self.generate_uuid(),
+                "X-Pigeon-Rawclienttime": str(round(time.time() * 1000) / 1000),
+                "X-MID": self.mid,  # "XkAyKQABAAHizpYQvHzNeBo4E9nm" in instabot
+            },
+        )
 
     @staticmethod
     def with_query_params(data, params):
         return dict(data, **{"query_params": json.dumps(params, separators=(",", ":"))})
 
+    def _private_session(self):
+        """
+        Session for the current thread
+
+        The login flow workers run private requests concurrently, and a
+        requests.Session is not thread safe. Give every worker thread
+        its own session that shares the main session's cookie jar (the
+        jar locks its writes internally), while the main thread keeps
+        using self.private.
+
+        Returns
+        -------
+        requests.Session
+            Session bound to the calling thread
+        """
+        if threading.current_thread() is threading.main_thread():
+            return self.private
+        session = getattr(self._thread_locals, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.cookies = self.private.cookies
+            # Share the tuned connection pool so worker requests reuse
+            # the main session's keep-alive connections instead of
+            # paying a fresh TCP/TLS handshake per flow
+            session.mount("https://", self._private_adapter)
+            session.mount("http://", self._private_adapter)
+            self._thread_locals.session = session
+        session.proxies = self.private.proxies
+        return session
+
     def _send_private_request(
         self,
         endpoint,
@@ -152,13 +202,16 @@ class PrivateRequestMixin:
     ):
         self.last_response = None
         self.last_json = last_json = {}  # for Sentry context in traceback
-        self.private.headers.update(self.base_headers)
-        if headers:
-            self.private.headers.update(headers)
-        if not login:
-            time.sleep(self.request_timeout)
         if self.user_id and login:
             raise Exception(f"User already login ({self.user_id})")
+        if not login:
+            time.sleep(self.request_timeout)
+        # Headers travel with the request instead of being written into
+        # the shared session, whose dict concurrent flow workers iterate
+        request_headers = self.base_headers
+        if headers:
+            request_headers.update(headers)
+        session = self._private_session()
         try:
             if not endpoint.startswith('/'):
                 endpoint = f"/v1/{endpoint}"
@@ -171,11 +224,14 @@ class PrivateRequestMixin:
                     data = generate_signature(dumps(data))
                     if extra_sig:
                         data += "&".join(extra_sig)
-                response = self.private.post(
-                    api_url, data=data, params=params
+                response = session.post(
+                    api_url, data=data, params=params, headers=request_headers
                 )
             else:  # GET
-                response = self.private.get(api_url, params=params)
+                response = session.get(
+                    api_url, params=params, headers=request_headers
+                )
+            self._clear_cookie_cache()
             self.logger.debug(
                 "private_request %s: %s (%s)", response.status_code, response.url, response.text
             )
@@ -204,63 +260,70 @@ class PrivateRequestMixin:
             except JSONDecodeError:
                 pass
             message = last_json.get("message", "")
-            if e.response.status_code == 403:
-                if message == "login_required":
-                    raise LoginRequired(response=e.response, **last_json)
-                raise ClientForbiddenError(e, response=e.response, **last_json)
-            elif e.response.status_code == 400:
-                error_type = last_json.get("error_type")
-                if message == "challenge_required":
-                    raise ChallengeRequired(**last_json)
-                elif message == "feedback_required":
-                    raise FeedbackRequired(
-                        **dict(
-                            last_json,
-                            message="%s: %s"
-                            % (message, last_json.get("feedback_message")),
+            try:
+                if e.response.status_code == 403:
+                    if message == "login_required":
+                        raise LoginRequired(response=e.response, **last_json)
+                    raise ClientForbiddenError(e, response=e.response, **last_json)
+                elif e.response.status_code == 400:
+                    error_type = last_json.get("error_type")
+                    if message == "challenge_required":
+                        raise ChallengeRequired(**last_json)
+                    elif message == "feedback_required":
+                        raise FeedbackRequired(
+                            **dict(
+                                last_json,
+                                message="%s: %s"
+                                % (message, last_json.get("feedback_message")),
+                            )
                         )
+                    elif error_type == "sentry_block":
+                        raise SentryBlock(**last_json)
+                    elif error_type == "rate_limit_error":
+                        raise RateLimitError(**last_json)
+                    elif error_type == "bad_password":
+                        raise BadPassword(**last_json)
+                    elif error_type == "two_factor_required":
+                        if not last_json['message']:
+                            last_json['message'] = "Two-factor authentication required"
+                        raise TwoFactorRequired(**last_json)
+                    elif "Please wait a few minutes before you try again" in message:
+                        raise PleaseWaitFewMinutes(e, response=e.response, **last_json)
+                    elif "VideoTooLongException" in message:
+                        raise VideoTooLongException(e, response=e.response, **last_json)
+                    elif error_type or message:
+                        raise UnknownError(**last_json)
+                    # TODO: Handle last_json with {'message': 'counter get error', 'status': 'fail'}
+                    self.logger.exception(e)
+                    self.logger.warning(
+                        "Status 400: %s", message or "Empty response message. Maybe enabled Two-factor auth?"
                     )
-                elif error_type == "sentry_block":
-                    raise SentryBlock(**last_json)
-                elif error_type == "rate_limit_error":
-                    raise RateLimitError(**last_json)
-                elif error_type == "bad_password":
-                    raise BadPassword(**last_json)
-                elif error_type == "two_factor_required":
-                    if not last_json['message']:
-                        last_json['message'] = "Two-factor authentication required"
-                    raise TwoFactorRequired(**last_json)
-                elif "Please wait a few minutes before you try again" in message:
-                    raise PleaseWaitFewMinutes(e, response=e.response, **last_json)
-                elif "VideoTooLongException" in message:
-                    raise VideoTooLongException(e, response=e.response, **last_json)
-                elif error_type or message:
-                    raise UnknownError(**last_json)
-                # TODO: Handle last_json with {'message': 'counter get error', 'status': 'fail'}
-                self.logger.exception(e)
-                self.logger.warning(
-                    "Status 400: %s", message or "Empty response message. Maybe enabled Two-factor auth?"
-                )
-                raise ClientBadRequestError(
-                    e, response=e.response, **last_json)
-            elif e.response.status_code == 429:
-                self.logger.warning("Status 429: Too many requests")
-                if "Please wait a few minutes before you try again" in message:
-                    raise PleaseWaitFewMinutes(e, response=e.response, **last_json)
-                raise ClientThrottledError(e, response=e.response, **last_json)
-            elif e.response.status_code == 404:
-                self.logger.warning(
-                    "Status 404: Endpoint %s does not exists", endpoint)
-                raise ClientNotFoundError(e, response=e.response, **last_json)
-            elif e.response.status_code == 408:
-                self.logger.warning("Status 408: Request Timeout")
-                raise ClientRequestTimeout(e, response=e.response, **last_json)
-            raise ClientError(e, response=e.response, **last_json)
+                    raise ClientBadRequestError(
+                        e, response=e.response, **last_json)
+                elif e.response.status_code == 429:
+                    self.logger.warning("Status 429: Too many requests")
+                    if "Please wait a few minutes before you try again" in message:
+                        raise PleaseWaitFewMinutes(e, response=e.response, **last_json)
+                    raise ClientThrottledError(e, response=e.response, **last_json)
+                elif e.response.status_code == 404:
+                    self.logger.warning(
+                        "Status 404: Endpoint %s does not exists", endpoint)
+                    raise ClientNotFoundError(e, response=e.response, **last_json)
+                elif e.response.status_code == 408:
+                    self.logger.warning("Status 408: Request Timeout")
+                    raise ClientRequestTimeout(e, response=e.response, **last_json)
+                raise ClientError(e, response=e.response, **last_json)
+            except ClientError as err:
+                # Carry this response's json on the exception so the
+                # recovery path does not read self.last_json, which a
+                # concurrent flow worker may have overwritten
+                err.last_json = last_json
+                raise
         except requests.ConnectionError as e:
             raise ClientConnectionError(
                 "{e.__class__.__name__} {e}".format(e=e))
         if last_json.get("status") == "fail":
-            raise ClientError(response=response, **last_json)
+            raise ClientError(response=response, last_json=last_json, **last_json)
         elif "error_title" in last_json:
             """Example: {
             'error_title': 'bad image input extra:{}', <-------------
@@ -271,13 +334,15 @@ class PrivateRequestMixin:
             'message': 'media_needs_reupload', <-------------
             'status': 'ok' <-------------
             }"""
-            raise ClientError(response=response, **last_json)
+            raise ClientError(response=response, last_json=last_json, **last_json)
         return last_json
 
     def request_log(self, response):
         self.request_logger.info(
             "%s [%s] %s %s (%s)",
-            self.username,
+            # Raw attribute: the username property may lazily resolve
+            # over the network, which logging must never trigger
+            self._username,
             response.status_code,
             response.request.method,
             response.url,
@@ -305,7 +370,9 @@ class PrivateRequestMixin:
         )
         try:
             self.private_requests_count += 1
-            self._send_private_request(endpoint, **kwargs)
+            # Return the local result, not self.last_json: concurrent
+            # callers would otherwise read each other's responses
+            return self._send_private_request(endpoint, **kwargs)
         except ClientRequestTimeout:
             print('Wait 60 seconds and try one more time (ClientRequestTimeout)')
             time.sleep(60)
@@ -313,14 +380,16 @@ class PrivateRequestMixin:
         # except BadPassword as e:
         #     raise e
         except Exception as e:
+            # Prefer the json carried on the exception: self.last_json
+            # may already hold a concurrent worker's response
+            last_json = getattr(e, "last_json", self.last_json)
             if self.handle_exception:
                 self.handle_exception(self, e)
             elif isinstance(e, ChallengeRequired):
-                self.challenge_resolve(self.last_json)
+                self.challenge_resolve(last_json)
             else:
                 raise e
             if login and self.user_id:
                 # After challenge resolve return last_json
-                return self.last_json
+                return last_json
             return self._send_private_request(endpoint, **kwargs)
-        return self.last_json
@@ -1,4 +1,3 @@
-import json
 import shutil
 from copy import deepcopy
 from pathlib import Path
@@ -185,7 +184,7 @@ class StoryMixin:
             A list of objects of Story
         """
         params = {
-            "supported_capabilities_new": json.dumps(config.SUPPORTED_CAPABILITIES)
+            "supported_capabilities_new": config.SUPPORTED_CAPABILITIES_JSON
         }
         user_id = int(user_id)
         reel = self.private_request(f"feed/user/{user_id}/story/", params=params)[
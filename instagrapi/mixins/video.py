@@ -462,7 +462,7 @@ class UploadVideoMixin:
         timestamp = int(time.time())
         story_sticker_ids = []
         data = {
-            "supported_capabilities_new": dumps(config.SUPPORTED_CAPABILITIES),
+            "supported_capabilities_new": config.SUPPORTED_CAPABILITIES_JSON,
             "has_original_sound": "1",
             # Segment mode (when file is too big):
             # "allow_multi_configures": "1",
@@ -4,12 +4,19 @@ import json
 import random
 import string
 import urllib
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from . import config
 
 
 class InstagramIdCodec:
     ENCODING_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    ENCODING_INDEX = {char: idx for idx, char in enumerate(ENCODING_CHARS)}
 
     @staticmethod
     def encode(num, alphabet=ENCODING_CHARS):
@@ -17,24 +24,26 @@ class InstagramIdCodec:
         num = int(num)
         if num == 0:
             return alphabet[0]
-        arr = []
         base = len(alphabet)
+        arr = []
+        append = arr.append
         while num:
-            rem = num % base
-            num //= base
-            arr.append(alphabet[rem])
-        arr.reverse()
-        return "".join(arr)
+            num, rem = divmod(num, base)
+            append(alphabet[rem])
+        return "".join(reversed(arr))
 
     @staticmethod
     def decode(shortcode, alphabet=ENCODING_CHARS):
         """Covert a shortcode to a numeric value."""
+        if alphabet == InstagramIdCodec.ENCODING_CHARS:
+            index = InstagramIdCodec.ENCODING_INDEX
+        else:
+            index = {char: idx for idx, char in enumerate(alphabet)}
         base = len(alphabet)
-        strlen = len(shortcode)
-        return sum(
-            alphabet.index(char) * base ** (strlen - (idx + 1))
-            for idx, char in enumerate(shortcode)
-        )
+        num = 0
+        for char in shortcode:
+            num = num * base + index[char]
+        return num
 
 
 def generate_signature_old(data):
@@ -49,7 +58,10 @@ def generate_signature_old(data):
     )
 
 
+@lru_cache(maxsize=128)
 def generate_signature(data):
+    # Retries and challenge re-sends sign identical bodies, so the
+    # quote_plus result is worth memoizing
     return "signed_body=SIGNATURE.{data}".format(
         data=urllib.parse.quote_plus(data)
     )
@@ -77,9 +89,18 @@ def gen_csrftoken(size=32):
 
 
 def dumps(data):
+    if orjson:
+        return orjson.dumps(data).decode()
     return json.dumps(data, separators=(",", ":"))
 
 
+def loads(data):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def generate_jazoest(symbols: str) -> str:
-    amount = sum(ord(s) for s in symbols)
+    # symbols is an ASCII uuid, so the ord sum equals the byte sum
+    amount = sum(symbols.encode("ascii"))
     return f'2{amount}'